@@ -27,12 +27,24 @@ int main() {
     double *u = (double*)malloc(N * sizeof(double));
     double *uNew = (double*)malloc(N * sizeof(double));
 
+    // Separable Gaussian: Nx + Ny exp calls instead of Nx * Ny
+    double *xv = (double*)malloc(Nx * sizeof(double));
+    double *yv = (double*)malloc(Ny * sizeof(double));
+    for(int i = 0; i < Nx; i++) {
+        double x = i * dx - Lx / 2;
+        xv[i] = exp(-50*x*x);
+    }
+    for(int j = 0; j < Ny; j++) {
+        double y = j * dy - Ly / 2;
+        yv[j] = exp(-50*y*y);
+    }
     for(int i = 0; i < Nx; i++) {
         for(int j = 0; j < Ny; j++) {
-            double x = i * dx - Lx / 2, y = j * dy - Ly / 2;
-            u[IDX(i,j,Ny)] = exp(-50*(x*x + y*y));
+            u[IDX(i,j,Ny)] = xv[i] * yv[j];
         }
     }
+    free(xv);
+    free(yv);
 
     double *d_u, *d_uNew;
     cudaMalloc(&d_u, N * sizeof(double));
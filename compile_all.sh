@@ -11,7 +11,9 @@ gcc -O3 -fopenmp -o openmp_heat omp_heat.c -lm
 # CUDA version (only if CUDA is installed)
 if command -v nvcc &>/dev/null; then
     echo "Compiling CUDA version..."
-    nvcc -O3 -o cuda_heat cuda_heat.cu
+    nvcc -O3 -arch=native -use_fast_math -lineinfo --ptxas-options=-v -o cuda_heat cuda_heat.cu
+    echo "Compiling CUDA shared library..."
+    nvcc -O3 -arch=native -use_fast_math -shared -Xcompiler -fPIC -DHEAT_LIBRARY -o libheat.so cuda_heat.cu
 else
     echo "nvcc not found - skipping CUDA compilation"
 fi
@@ -2,101 +2,523 @@
 #include <stdlib.h>
 #include <math.h>
 #include <cuda_runtime.h>
+#include <cooperative_groups.h>
+
+namespace cg = cooperative_groups;
 
 #define IDX(i,j,N) ((i)*(N)+(j))
 
-__global__ void update_kernel(double *u, double *uNew, int Nx, int Ny, double dx, double dy, double alpha, double dt) {
-    int i = blockIdx.x * blockDim.x + threadIdx.x + 1;
-    int j = blockIdx.y * blockDim.y + threadIdx.y + 1;
-    if (i < Nx-1 && j < Ny-1) {
-        double uxx = (u[IDX(i+1,j,Ny)] - 2*u[IDX(i,j,Ny)] + u[IDX(i-1,j,Ny)])/(dx*dx);
-        double uyy = (u[IDX(i,j+1,Ny)] - 2*u[IDX(i,j,Ny)] + u[IDX(i,j-1,Ny)])/(dy*dy);
-        uNew[IDX(i,j,Ny)] = u[IDX(i,j,Ny)] + alpha*dt*(uxx+uyy);
+// Grid values are stored in FP32 by default; build with -DUSE_FP64 for
+// double-precision reference runs (e.g. for the error analysis).
+#ifdef USE_FP64
+typedef double real_t;
+#else
+typedef float real_t;
+#endif
+
+// Build with -DUSE_MANAGED to keep both grids in CUDA managed memory,
+// prefetched to the device (where supported) instead of allocated with
+// cudaMalloc.
+
+// Build with -DUSE_PERSISTENT to run all time steps in the single
+// cooperative heat_time_loop launch (on devices that support cooperative
+// launch). The default is the shared-memory tiled update_kernel_fused /
+// update_kernel launch loop: the persistent kernel saves the ~Nt/2 host
+// launches but cannot keep a halo tile across grid.sync(), so it reloads
+// every neighbour from global memory each step. It has not been measured
+// to be faster, hence opt-in.
+
+// Time steps advanced per launch of update_kernel_fused
+#define STEPS_PER_LAUNCH 2
+
+// Threads per block of the stepping kernels and the minimum number of
+// resident blocks per SM requested from the compiler via __launch_bounds__
+#define BLOCK_THREADS 256
+#define MIN_BLOCKS_PER_SM 4
+
+// Gaussian initial condition, written to both buffers so the fixed boundary
+// values are present in whichever buffer a step reads from.
+// threadIdx.x runs along j, the contiguous axis of IDX(i,j,Ny).
+// The Gaussian is separable, exp(-50(x^2+y^2)) = exp(-50x^2)*exp(-50y^2):
+// each block evaluates blockDim.x + blockDim.y factors into shared memory
+// (blockDim.x + blockDim.y doubles) instead of one exp per point.
+template <typename T>
+__global__ void init_gaussian(T *u, T *uNew, int Nx, int Ny, double dx, double dy, double Lx, double Ly) {
+    extern __shared__ __align__(16) unsigned char s_raw[];
+    double *s_yv = reinterpret_cast<double*>(s_raw);
+    double *s_xv = s_yv + blockDim.x;
+    int j = blockIdx.x * blockDim.x + threadIdx.x;
+    int i = blockIdx.y * blockDim.y + threadIdx.y;
+
+    if (threadIdx.y == 0) {
+        double y = j*dy - Ly/2;
+        s_yv[threadIdx.x] = exp(-50*y*y);
+    }
+    if (threadIdx.x == 0) {
+        double x = i*dx - Lx/2;
+        s_xv[threadIdx.y] = exp(-50*x*x);
     }
+    __syncthreads();
+
+    if (i < Nx && j < Ny)
+        u[IDX(i,j,Ny)] = uNew[IDX(i,j,Ny)] = (T)(s_xv[threadIdx.y] * s_yv[threadIdx.x]);
 }
 
-int main(int argc, char *argv[]) {
-    int Nx = 200, Ny = 200;
-    int Nt = 1000;
+// Explicit update of one point from its 5-point neighbourhood
+// (E/W are the i+1/i-1 neighbours, N/S the j+1/j-1 neighbours).
+// Written as two nested fma calls so FFMA/DFMA is emitted even without fast-math.
+template <typename T>
+__device__ __forceinline__ T heat_point(T uC, T uE, T uW, T uN, T uS, T cx, T cy) {
+    return fma(cx, uE - T(2)*uC + uW, fma(cy, uN - T(2)*uC + uS, uC));
+}
+
+// Two-wide vector type matching T, for paired loads/stores along j
+template <typename T> struct vec2;
+template <> struct vec2<float>  { typedef float2 type; };
+template <> struct vec2<double> { typedef double2 type; };
+
+// Stages the Ti x Tj tile of u whose point (0,0) is global (i0,j0) into s,
+// and into s2 as well unless it is NULL; points outside the grid are skipped.
+// With even Ny every row starts on a vector boundary, so the rows are read
+// as aligned T2 pairs starting at the even column at or left of j0.
+template <typename T>
+__device__ __forceinline__ void load_tile(const T* __restrict__ u, T *s, T *s2, int Nx, int Ny, int i0, int j0, int Ti, int Tj) {
+    int tid = threadIdx.y * blockDim.x + threadIdx.x;
+    int nthreads = blockDim.x * blockDim.y;
+    if (Ny % 2 == 0) {
+        typedef typename vec2<T>::type T2;
+        int jA = j0 & ~1;
+        int P = (j0 + Tj - jA + 1) / 2;   // pairs per tile row
+        for (int t = tid; t < Ti*P; t += nthreads) {
+            int li = t / P, gi = i0 + li, gj = jA + 2 * (t % P);
+            if (gi < 0 || gi >= Nx || gj < 0 || gj >= Ny)
+                continue;
+            T2 v = __ldg(reinterpret_cast<const T2*>(u + IDX(gi,gj,Ny)));
+            int c = IDX(li, gj - j0, Tj);
+            if (gj >= j0) {
+                s[c] = v.x;
+                if (s2) s2[c] = v.x;
+            }
+            if (gj + 1 < j0 + Tj) {
+                s[c+1] = v.y;
+                if (s2) s2[c+1] = v.y;
+            }
+        }
+    } else {
+        for (int t = tid; t < Ti*Tj; t += nthreads) {
+            int gi = i0 + t / Tj, gj = j0 + t % Tj;
+            if (gi >= 0 && gi < Nx && gj >= 0 && gj < Ny) {
+                s[t] = __ldg(&u[IDX(gi,gj,Ny)]);
+                if (s2) s2[t] = s[t];
+            }
+        }
+    }
+}
+
+// Writes the blockDim.y x blockDim.x block of tile s starting at s[c0] (row
+// pitch Tj) to uNew at global (i,j), keeping rows below Nx-1 and columns
+// below Ny. Boundary columns in the block hold their unchanged values. When
+// j and Ny are even the rows are written as aligned T2 pairs.
+template <typename T>
+__device__ __forceinline__ void store_core(const T *s, int c0, int Tj, T* __restrict__ uNew, int Nx, int Ny, int i, int j) {
+    if (Ny % 2 == 0 && j % 2 == 0 && blockDim.x % 2 == 0) {
+        typedef typename vec2<T>::type T2;
+        int P = blockDim.x / 2;
+        int t = threadIdx.y * blockDim.x + threadIdx.x;
+        if (t < (int)blockDim.y * P) {
+            int r = t / P, q = 2 * (t % P);
+            if (i + r < Nx-1 && j + q < Ny) {
+                T2 v;
+                v.x = s[c0 + IDX(r,q,Tj)];
+                v.y = s[c0 + IDX(r,q,Tj) + 1];
+                *reinterpret_cast<T2*>(uNew + IDX(i+r, j+q, Ny)) = v;
+            }
+        }
+    } else {
+        int r = threadIdx.y, q = threadIdx.x;
+        if (i + r < Nx-1 && j + q < Ny)
+            uNew[IDX(i+r, j+q, Ny)] = s[c0 + IDX(r,q,Tj)];
+    }
+}
+
+// threadIdx.x runs along j, the contiguous axis of IDX(i,j,Ny), so a warp
+// reads consecutive addresses. Blocks cover rows 1..Nx-2 and columns
+// 0..Ny-1 (starting at an even j so the rows can move as T2 pairs); the
+// j = 0 and j = Ny-1 columns are written back unchanged.
+template <typename T>
+__global__ void __launch_bounds__(BLOCK_THREADS, MIN_BLOCKS_PER_SM) update_kernel(const T* __restrict__ u, T* __restrict__ uNew, int Nx, int Ny, T cx, T cy) {
+    // Halo tile of (blockDim.y+2) rows x (blockDim.x+2) columns staged in shared memory
+    extern __shared__ __align__(16) unsigned char s_raw[];
+    T *s_u = reinterpret_cast<T*>(s_raw);
+    int Tj = blockDim.x + 2;
+    int i0 = blockIdx.y * blockDim.y, j0 = blockIdx.x * blockDim.x - 1;
+
+    // u is never written during a launch, so loads go through the read-only cache
+    load_tile(u, s_u, (T*)NULL, Nx, Ny, i0, j0, blockDim.y+2, Tj);
+    __syncthreads();
+
+    int i = i0 + threadIdx.y + 1, j = j0 + threadIdx.x + 1;
+    int c = IDX(threadIdx.y+1, threadIdx.x+1, Tj);
+    bool inside = (i < Nx-1 && j > 0 && j < Ny-1);
+    // cx = alpha*dt/dx^2 and cy = alpha*dt/dy^2 are precomputed on the host
+    T out = inside ? heat_point(s_u[c], s_u[c+Tj], s_u[c-Tj], s_u[c+1], s_u[c-1], cx, cy) : T(0);
+    __syncthreads();
+
+    // The new values replace the tile core, which is then written back in rows
+    if (inside) s_u[c] = out;
+    __syncthreads();
+    store_core(s_u, IDX(1,1,Tj), Tj, uNew, Nx, Ny, i0+1, j0+1);
+}
+
+// Advances K time steps in one launch. Each block loads a
+// (blockDim.y+2K) x (blockDim.x+2K) tile, steps it K times in shared memory
+// (the valid region shrinks by one point per step) and writes back the
+// blockDim.y x blockDim.x core. Blocks are laid out as in update_kernel.
+template <typename T, int K>
+__global__ void __launch_bounds__(BLOCK_THREADS, MIN_BLOCKS_PER_SM) update_kernel_fused(const T* __restrict__ u, T* __restrict__ uNew, int Nx, int Ny, T cx, T cy) {
+    extern __shared__ __align__(16) unsigned char s_raw[];
+    int Ti = blockDim.y + 2*K, Tj = blockDim.x + 2*K;
+    T *s_a = reinterpret_cast<T*>(s_raw);
+    T *s_b = s_a + Ti*Tj;
+
+    // Global index of tile point (0,0)
+    int i0 = blockIdx.y * blockDim.y + 1 - K;
+    int j0 = blockIdx.x * blockDim.x - K;
+    int tid = threadIdx.y * blockDim.x + threadIdx.x;
+    int nthreads = blockDim.x * blockDim.y;
+
+    // Boundary points never change, so they are staged into both buffers
+    load_tile(u, s_a, s_b, Nx, Ny, i0, j0, Ti, Tj);
+    __syncthreads();
+
+    T *src = s_a, *dst = s_b;
+    #pragma unroll
+    for (int k = 1; k <= K; ++k) {
+        for (int t = tid; t < Ti*Tj; t += nthreads) {
+            int li = t / Tj, lj = t % Tj;
+            int gi = i0 + li, gj = j0 + lj;
+            if (li >= k && li < Ti-k && lj >= k && lj < Tj-k &&
+                gi > 0 && gi < Nx-1 && gj > 0 && gj < Ny-1)
+                dst[t] = heat_point(src[t], src[t+Tj], src[t-Tj], src[t+1], src[t-1], cx, cy);
+        }
+        __syncthreads();
+        T *tmp = src; src = dst; dst = tmp;
+    }
+
+    store_core(src, IDX(K,K,Tj), Tj, uNew, Nx, Ny, i0+K, j0+K);
+}
+
+// One time step over the interior, one point per iteration
+template <typename T>
+__device__ void heat_step_points(const T *src, T *dst, int Nx, int Ny, T cx, T cy, int first, int stride) {
+    int nInner = (Nx-2) * (Ny-2);
+    for (int p = first; p < nInner; p += stride) {
+        int i = p / (Ny-2) + 1, j = p % (Ny-2) + 1;
+        int c = IDX(i,j,Ny);
+        dst[c] = heat_point(src[c], src[c+Ny], src[c-Ny], src[c+1], src[c-1], cx, cy);
+    }
+}
+
+// One time step over rows 1..Nx-2, two adjacent j per iteration using
+// aligned vector loads/stores. Requires even Ny so that every pair
+// (j, j+1) with even j starts on a vector boundary. The j = 0 and
+// j = Ny-1 boundary points are written back unchanged.
+template <typename T>
+__device__ void heat_step_pairs(const T *src, T *dst, int Nx, int Ny, T cx, T cy, int first, int stride) {
+    typedef typename vec2<T>::type T2;
+    int half = Ny / 2;
+    int nPairs = (Nx-2) * half;
+    for (int p = first; p < nPairs; p += stride) {
+        int i = p / half + 1, j = 2 * (p % half);
+        int c = IDX(i,j,Ny);
+        T2 uC = *reinterpret_cast<const T2*>(src + c);
+        T2 uE = *reinterpret_cast<const T2*>(src + c + Ny);
+        T2 uW = *reinterpret_cast<const T2*>(src + c - Ny);
+        T uS = (j > 0) ? src[c-1] : uC.x;
+        T uN = (j+2 < Ny) ? src[c+2] : uC.y;
+        T2 out;
+        out.x = (j == 0)    ? uC.x : heat_point(uC.x, uE.x, uW.x, uC.y, uS, cx, cy);
+        out.y = (j+1 == Ny-1) ? uC.y : heat_point(uC.y, uE.y, uW.y, uN, uC.x, cx, cy);
+        *reinterpret_cast<T2*>(dst + c) = out;
+    }
+}
+
+// Persistent kernel: runs all Nt steps in one launch, ping-ponging between
+// a and b with a grid-wide barrier between steps. Must be launched through
+// cudaLaunchCooperativeKernel with no more blocks than can be co-resident.
+template <typename T>
+__global__ void __launch_bounds__(BLOCK_THREADS, MIN_BLOCKS_PER_SM) heat_time_loop(T *a, T *b, int Nx, int Ny, int Nt, T cx, T cy) {
+    cg::grid_group grid = cg::this_grid();
+    int first = blockIdx.x * blockDim.x + threadIdx.x;
+    int stride = gridDim.x * blockDim.x;
+
+    for (int n = 0; n < Nt; ++n) {
+        const T *src = (n & 1) ? b : a;
+        T *dst = (n & 1) ? a : b;
+        if (Ny % 2 == 0)
+            heat_step_pairs(src, dst, Nx, Ny, cx, cy, first, stride);
+        else
+            heat_step_points(src, dst, Nx, Ny, cx, cy, first, stride);
+        grid.sync();
+    }
+}
+
+// Solver state kept between run_heat calls, so repeated runs from a host
+// program (e.g. heat_demo.py via libheat.so) reuse the CUDA context, the
+// streams and, when the grid size is unchanged, the device buffers.
+static int heat_initialised = 0;
+static cudaStream_t sCompute, sCopy;   // kernels on sCompute, copy-back on sCopy
+static cudaEvent_t start, stop;
+static real_t *h_center;               // pinned 1-element centre readback
+static real_t *d_a = NULL, *d_b = NULL;
+static size_t d_bytes = 0;
+#ifndef USE_MANAGED
+static real_t *h_u = NULL;             // pinned staging for the full grid
+static size_t h_bytes = 0;
+#else
+static int managed_prefetch = 0;       // cudaDevAttrConcurrentManagedAccess
+#endif
+
+// Runs Nt steps on an Nx x Ny grid. Reports the kernel time (s), the
+// throughput (MLUPS) and the centre value, and copies the final grid into
+// out_u (Nx*Ny doubles, row-major) unless it is NULL. Any out_* pointer may
+// be NULL. Returns 0 on success, 1 on a CUDA error.
+extern "C" int run_heat(int Nx, int Ny, int Nt, double *out_u, double *out_time, double *out_mlups, double *out_center) {
     double Lx = 1.0, Ly = 1.0;
     double alpha = 0.0001;
     double dx = Lx/(Nx-1), dy = Ly/(Ny-1);
     double dt = 0.25 * fmin(dx*dx, dy*dy) / alpha;
+    double cx = alpha*dt/(dx*dx), cy = alpha*dt/(dy*dy);
     size_t N = Nx * Ny;
+    size_t bytes = N * sizeof(real_t);
 
-    // Host allocation
-    double *u = (double*)malloc(N * sizeof(double));
-    double *uNew = (double*)malloc(N * sizeof(double));
+    int dev;
+    cudaGetDevice(&dev);
+    if (!heat_initialised) {
+        if (cudaMallocHost((void**)&h_center, sizeof(real_t)) != cudaSuccess) {
+            h_center = NULL;
+            cudaGetLastError();   // clear it so the next call can succeed
+            return 1;
+        }
+        cudaStreamCreate(&sCompute);
+        cudaStreamCreate(&sCopy);
+        cudaEventCreate(&start);
+        cudaEventCreate(&stop);
+#ifdef USE_MANAGED
+        // Prefetching managed memory needs concurrent managed access, which
+        // is missing on Windows, WSL and pre-Pascal GPUs; the grids still
+        // migrate on demand there.
+        cudaDeviceGetAttribute(&managed_prefetch, cudaDevAttrConcurrentManagedAccess, dev);
+#endif
+        heat_initialised = 1;
+    }
 
-    // Initial condition
-    for(int i=0;i<Nx;i++){
-        for(int j=0;j<Ny;j++){
-            double x = i*dx - Lx/2, y = j*dy - Ly/2;
-            u[IDX(i,j,Ny)] = exp(-50*(x*x + y*y));
+    // Device allocation, reused while the grid size stays the same
+    if (bytes != d_bytes) {
+        cudaFree(d_a);
+        cudaFree(d_b);
+        d_a = d_b = NULL;
+        d_bytes = 0;
+#ifdef USE_MANAGED
+        cudaError_t ea = cudaMallocManaged(&d_a, bytes);
+        cudaError_t eb = cudaMallocManaged(&d_b, bytes);
+#else
+        cudaError_t ea = cudaMalloc(&d_a, bytes);
+        cudaError_t eb = cudaMalloc(&d_b, bytes);
+#endif
+        if (ea != cudaSuccess || eb != cudaSuccess) {
+            cudaFree(d_a);
+            cudaFree(d_b);
+            d_a = d_b = NULL;
+            cudaGetLastError();
+            return 1;
         }
+        d_bytes = bytes;
+    }
+#ifdef USE_MANAGED
+    if (managed_prefetch) {
+        cudaMemPrefetchAsync(d_a, bytes, dev, sCompute);
+        cudaMemPrefetchAsync(d_b, bytes, dev, sCompute);
     }
+#endif
+    real_t *d_u = d_a, *d_uNew = d_b;
 
-    // Device allocation
-    double *d_u, *d_uNew;
-    cudaMalloc(&d_u, N * sizeof(double));
-    cudaMalloc(&d_uNew, N * sizeof(double));
+    // Kernel launch config
+    // 32 threads along j (one warp per row segment) x 8 rows along i
+    dim3 block(32, BLOCK_THREADS/32);
+    dim3 grid((Ny+block.x-1)/block.x, (Nx-2+block.y-1)/block.y);
+    size_t shmem = (block.x+2) * (block.y+2) * sizeof(real_t);
+    size_t shmem_fused = 2 * (block.x+2*STEPS_PER_LAUNCH) * (block.y+2*STEPS_PER_LAUNCH) * sizeof(real_t);
 
-    // Copy initial data to device
-    cudaMemcpy(d_u, u, N * sizeof(double), cudaMemcpyHostToDevice);
+    // Initial condition, computed directly on the device
+    dim3 igrid((Ny+block.x-1)/block.x, (Nx+block.y-1)/block.y);
+    init_gaussian<real_t><<<igrid, block, (block.x+block.y)*sizeof(double), sCompute>>>(d_u, d_uNew, Nx, Ny, dx, dy, Lx, Ly);
+
+    // With USE_PERSISTENT the persistent kernel is used when the device
+    // supports cooperative launch; its grid is sized to the number of
+    // co-resident blocks.
+    int coop = 0;
+#ifdef USE_PERSISTENT
+    cudaDeviceGetAttribute(&coop, cudaDevAttrCooperativeLaunch, dev);
+#endif
+    dim3 pblock(BLOCK_THREADS), pgrid(1);
+    if (coop) {
+        int numSMs = 0, blocksPerSM = 0;
+        cudaDeviceGetAttribute(&numSMs, cudaDevAttrMultiProcessorCount, dev);
+        cudaOccupancyMaxActiveBlocksPerMultiprocessor(&blocksPerSM, heat_time_loop<real_t>, pblock.x, 0);
+        int work = (Ny % 2 == 0) ? (Nx-2)*(Ny/2) : (Nx-2)*(Ny-2);
+        int needed = (work + pblock.x - 1) / pblock.x;
+        pgrid.x = (unsigned)(numSMs * blocksPerSM < needed ? numSMs * blocksPerSM : needed);
+        coop = pgrid.x > 0;
+    }
+
+#ifndef USE_MANAGED
+    // Pinned staging buffer for the full grid, only when it is requested
+    if (out_u && h_bytes < N * sizeof(real_t)) {
+        cudaFreeHost(h_u);
+        h_bytes = 0;
+        if (cudaMallocHost((void**)&h_u, N * sizeof(real_t)) != cudaSuccess) {
+            h_u = NULL;
+            cudaGetLastError();
+            return 1;
+        }
+        h_bytes = N * sizeof(real_t);
+    }
+#endif
 
     // CUDA timing
-    cudaEvent_t start, stop;
-    cudaEventCreate(&start);
-    cudaEventCreate(&stop);
-    cudaEventRecord(start);
+    cudaEventRecord(start, sCompute);
 
-    // Kernel launch config
-    dim3 block(16, 16);
-    dim3 grid((Nx-2+block.x-1)/block.x, (Ny-2+block.y-1)/block.y);
+    if (coop) {
+        // Time-stepping in a single persistent launch
+        real_t rcx = (real_t)cx, rcy = (real_t)cy;
+        void *args[] = {&d_u, &d_uNew, &Nx, &Ny, &Nt, &rcx, &rcy};
+        cudaLaunchCooperativeKernel((void*)heat_time_loop<real_t>, pgrid, pblock, args, 0, sCompute);
+        // After an odd number of steps the result is in the second buffer
+        if (Nt & 1) { real_t *tmp = d_u; d_u = d_uNew; d_uNew = tmp; }
+    } else {
+        // Time-stepping, STEPS_PER_LAUNCH steps per launch
+        int n = 0;
+        for(; n+STEPS_PER_LAUNCH <= Nt; n += STEPS_PER_LAUNCH) {
+            update_kernel_fused<real_t, STEPS_PER_LAUNCH><<<grid, block, shmem_fused, sCompute>>>(d_u, d_uNew, Nx, Ny, (real_t)cx, (real_t)cy);
+            // Swap pointers
+            real_t *tmp = d_u; d_u = d_uNew; d_uNew = tmp;
+        }
+        // Remaining steps when Nt is not a multiple of STEPS_PER_LAUNCH
+        for(; n<Nt; n++) {
+            update_kernel<real_t><<<grid, block, shmem, sCompute>>>(d_u, d_uNew, Nx, Ny, (real_t)cx, (real_t)cy);
+            // Swap pointers
+            real_t *tmp = d_u; d_u = d_uNew; d_uNew = tmp;
+        }
+    }
+    cudaEventRecord(stop, sCompute);
 
-    // Time-stepping
-    for(int n=0; n<Nt; n++) {
-        update_kernel<<<grid, block>>>(d_u, d_uNew, Nx, Ny, dx, dy, alpha, dt);
-        // Swap pointers
-        double *tmp = d_u; d_u = d_uNew; d_uNew = tmp;
+    // Start the copy-back on sCopy as soon as the last step has finished,
+    // so it proceeds while the host reads the timer
+    cudaStreamWaitEvent(sCopy, stop, 0);
+    cudaMemcpyAsync(h_center, d_u + IDX(Nx/2,Ny/2,Ny), sizeof(real_t), cudaMemcpyDeviceToHost, sCopy);
+    if (out_u) {
+#ifdef USE_MANAGED
+        // Migrate the result back to the host and read it in place
+        if (managed_prefetch)
+            cudaMemPrefetchAsync(d_u, bytes, cudaCpuDeviceId, sCopy);
+#else
+        cudaMemcpyAsync(h_u, d_u, N * sizeof(real_t), cudaMemcpyDeviceToHost, sCopy);
+#endif
     }
-    cudaDeviceSynchronize();
-    cudaEventRecord(stop);
     cudaEventSynchronize(stop);
 
     float ms = 0;
     cudaEventElapsedTime(&ms, start, stop);
     double elapsed = ms * 1e-3;
 
-    // Copy result back
-    cudaMemcpy(u, d_u, N * sizeof(double), cudaMemcpyDeviceToHost);
-
     // Compute throughput
     double updates = (double)Nt*(Nx-2)*(Ny-2);
     double mlups = updates / elapsed / 1e6;
 
+    cudaStreamSynchronize(sCopy);
+    if (out_time) *out_time = elapsed;
+    if (out_mlups) *out_mlups = mlups;
+    if (out_center) *out_center = (double)*h_center;
+    if (out_u) {
+#ifdef USE_MANAGED
+        const real_t *src = d_u;
+#else
+        const real_t *src = h_u;
+#endif
+        for (size_t k = 0; k < N; k++) out_u[k] = (double)src[k];
+    }
+
+    return cudaGetLastError() == cudaSuccess ? 0 : 1;
+}
+
+#ifndef HEAT_LIBRARY
+// Writes an Nx x Ny row-major grid of doubles as a NumPy .npy (format 1.0)
+// file, so heat_error_analysis.py can load it without parsing text.
+static int write_npy(const char *filename, const double *u, int Nx, int Ny) {
+    FILE *file = fopen(filename, "wb");
+    if (file == NULL) return 1;
+
+    char header[128];
+    int len = snprintf(header, sizeof(header),
+                       "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }", Nx, Ny);
+    // Pad with spaces and end with '\n' so magic + header is a multiple of 64 bytes
+    int hlen = (10 + len + 1 + 63) / 64 * 64 - 10;
+    for (int k = len; k < hlen-1; k++) header[k] = ' ';
+    header[hlen-1] = '\n';
+    unsigned char magic[10] = {0x93, 'N', 'U', 'M', 'P', 'Y', 1, 0,
+                               (unsigned char)(hlen & 0xff), (unsigned char)(hlen >> 8)};
+
+    fwrite(magic, 1, sizeof(magic), file);
+    fwrite(header, 1, hlen, file);
+    fwrite(u, sizeof(double), (size_t)Nx * Ny, file);
+    fclose(file);
+    return 0;
+}
+
+int main(int argc, char *argv[]) {
+    int Nx = 200, Ny = 200;
+    int Nt = 1000;
+    // Read command line arguments
+    if (argc >= 3) {
+        Nx = atoi(argv[1]);
+        Ny = atoi(argv[2]);
+    }
+    if (argc >= 4) {
+        Nt = atoi(argv[3]);
+    }
+
+    double *u = (double*)malloc((size_t)Nx * Ny * sizeof(double));
+    double elapsed = 0, mlups = 0, center = 0;
+    if (run_heat(Nx, Ny, Nt, u, &elapsed, &mlups, &center) != 0) {
+        printf("Error: CUDA run failed\n");
+        free(u);
+        return 1;
+    }
+
+    if (write_npy("cuda_heat_distribution.npy", u, Nx, Ny) != 0) {
+        printf("Error: Could not create output file\n");
+        free(u);
+        return 1;
+    }
+    free(u);
+
     // Report
-    printf("Implementation: Hybrid\n");
+    printf("Implementation: CUDA\n");
     printf("GridSize: %dx%d\n", Nx, Ny);
     printf("TimeSteps: %d\n", Nt);
     printf("Time: %.6f\n", elapsed);
     printf("Throughput: %.2f\n", mlups);
-    printf("CenterValue: %f\n", u[IDX(Nx/2,Ny/2,Ny)]);
+    printf("CenterValue: %f\n", center);
     
     // printf("CUDA run (GPU):\n");
     // printf("  Time           : %.6f s\n", elapsed);
     // printf("  Throughput     : %.2f MLUPS\n", mlups);
-    // printf("  u_center (mid) : %f\n", u[IDX(Nx/2,Ny/2,Ny)]);
+    // printf("  u_center (mid) : %f\n", center);
 
-    // Cleanup
-    free(u);
-    free(uNew);
-    cudaFree(d_u);
-    cudaFree(d_uNew);
-    cudaEventDestroy(start);
-    cudaEventDestroy(stop);
     return 0;
-} 
+}
+#endif
 
 //!nvcc -O3 -o cuda_heat cuda_heat.cu
 //!./cuda_heat
\ No newline at end of file
@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
 import sys
@@ -13,10 +12,20 @@ def load_heat_data(filename):
 
     metadata = {}
 
+    # Binary .npy grids (written by the CUDA solver) carry no metadata and
+    # are memory-mapped instead of parsed
+    if filename.endswith('.npy'):
+        try:
+            heat_data = np.load(filename, mmap_mode='r')
+            print(f"Loaded {filename}: Shape {heat_data.shape}")
+            return heat_data, metadata
+        except Exception as e:
+            print(f"Error loading {filename}: {e}")
+            return None, None
+
     # Read metadata from header comments
     with open(filename, 'r') as f:
-        lines = f.readlines()
-        for line in lines:
+        for line in f:
             if line.startswith('#'):
                 if 'Grid Size:' in line:
                     size_str = line.split(':')[1].strip()
@@ -30,11 +39,12 @@ def load_heat_data(filename):
             else:
                 break
 
-    # Load the numerical data, skipping header lines
+    # Load the numerical data, skipping header comment lines and
+    # whitespace-only lines (some outputs end with one)
     try:
-        data = pd.read_csv(filename, comment='#', header=0)
-        # Convert to numpy array
-        heat_data = data.values
+        with open(filename, 'r') as f:
+            heat_data = np.loadtxt((line for line in f if line.strip()),
+                                   delimiter=',', comments='#', dtype=np.float64, ndmin=2)
         print(f"Loaded {filename}: Shape {heat_data.shape}")
         return heat_data, metadata
     except Exception as e:
@@ -51,24 +61,29 @@ def calculate_errors(reference_data, comparison_data, method_name):
         print(f"Reference shape: {reference_data.shape}, Comparison shape: {comparison_data.shape}")
         return None
 
-    # Calculate point-wise absolute errors
+    # Calculate point-wise absolute errors (the only full-size difference array)
     absolute_errors = np.abs(reference_data - comparison_data)
 
     # Calculate relative errors (avoid division by zero)
-    relative_errors = np.divide(absolute_errors, np.abs(reference_data), 
+    abs_reference = np.abs(reference_data)
+    relative_errors = np.divide(absolute_errors, abs_reference,
                                out=np.zeros_like(absolute_errors), 
-                               where=np.abs(reference_data)>1e-15)
-
-    # Calculate error metrics
-    mse = np.mean(np.square(reference_data - comparison_data))
+                               where=abs_reference>1e-15)
+
+    # Calculate error metrics from two reductions over absolute_errors:
+    # its sum and its sum of squares (|d|^2 == d^2)
+    flat_errors = absolute_errors.ravel()
+    n = flat_errors.size
+    mean_abs_error = flat_errors.sum() / n
+    mse = np.dot(flat_errors, flat_errors) / n
     rmse = np.sqrt(mse)
-    max_abs_error = np.max(absolute_errors)
-    mean_abs_error = np.mean(absolute_errors)
+    max_abs_error = flat_errors.max()
     max_rel_error = np.max(relative_errors)
     mean_rel_error = np.mean(relative_errors)
 
-    # Standard deviation of errors
-    std_abs_error = np.std(absolute_errors)
+    # Standard deviation of errors, from the deviations about the mean
+    deviations = flat_errors - mean_abs_error
+    std_abs_error = np.sqrt(np.dot(deviations, deviations) / n)
 
     error_metrics = {
         'method': method_name,
@@ -172,7 +187,7 @@ def create_error_visualizations(all_errors, reference_data):
             break  # Stop if we run out of subplot axes
 
         ax_err = axes[plot_index]
-        error_map = data.get('absolute_error')
+        error_map = data.get('absolute_errors')
         
         if error_map is not None:
             # Use a diverging colormap (e.g., 'coolwarm') for errors.
@@ -216,8 +231,11 @@ def main():
         openmp_data, _ = load_heat_data('openmp_heat_distribution.csv')
         print(f"Loaded openmp_heat_distribution.csv: Shape {openmp_data.shape}")
 
-        cuda_data, _ = load_heat_data('cuda_heat_distribution.csv')
-        print(f"Loaded cuda_heat_distribution.csv: Shape {cuda_data.shape}")
+        cuda_file = 'cuda_heat_distribution.npy'
+        if not os.path.exists(cuda_file):
+            cuda_file = 'cuda_heat_distribution.csv'
+        cuda_data, _ = load_heat_data(cuda_file)
+        print(f"Loaded {cuda_file}: Shape {cuda_data.shape}")
         
         hybrid_data, _ = load_heat_data('hybrid_heat_distribution.csv')
         print(f"Loaded hybrid_heat_distribution.csv: Shape {hybrid_data.shape}")
@@ -247,22 +265,16 @@ def main():
         print(f"Calculating errors for {method} method...")
         
         # Calculate error metrics
-        absolute_error = np.abs(reference_data - data)
-        mse = np.mean((reference_data - data) ** 2)
-        rmse = np.sqrt(mse)
-        max_abs_error = np.max(absolute_error)
+        err = calculate_errors(reference_data, data, method)
+        if err is None:
+            continue
         
-        print(f"  MSE: {mse:.6e}")
-        print(f"  RMSE: {rmse:.6e}")
-        print(f"  Max Absolute Error: {max_abs_error:.6e}\n")
+        print(f"  MSE: {err['mse']:.6e}")
+        print(f"  RMSE: {err['rmse']:.6e}")
+        print(f"  Max Absolute Error: {err['max_absolute_error']:.6e}\n")
 
         # FIX: Assign the results to a key in the dictionary.
-        all_errors[method] = {
-            'mse': mse,
-            'rmse': rmse,
-            'max_absolute_error': max_abs_error,
-            'absolute_error': absolute_error
-        }
+        all_errors[method] = err
 
     # --- Reporting and Visualization ---
     print("Generating error analysis report...")
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import subprocess
 import platform
+from ctypes import CDLL, POINTER, byref, c_int, c_double
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
@@ -109,6 +110,36 @@ class HeatEquationApp:
         # Initialize variables
         self.grid_size = 200
         
+        # CUDA solver library, loaded once per app lifetime so runs reuse the
+        # CUDA context; falls back to the cuda_heat executable if missing
+        self.heat_lib = self.load_heat_library()
+        
+    def load_heat_library(self):
+        try:
+            lib = CDLL("./libheat.so")
+        except OSError:
+            return None
+        lib.run_heat.argtypes = [c_int, c_int, c_int, POINTER(c_double),
+                                 POINTER(c_double), POINTER(c_double), POINTER(c_double)]
+        lib.run_heat.restype = c_int
+        return lib
+    
+    def run_cuda_library(self, grid_size, time_steps):
+        elapsed, mlups, center = c_double(), c_double(), c_double()
+        status = self.heat_lib.run_heat(grid_size, grid_size, time_steps, None,
+                                        byref(elapsed), byref(mlups), byref(center))
+        if status != 0:
+            raise RuntimeError("CUDA library run failed")
+        
+        # Same report format as the solver executables
+        output = "Implementation: CUDA\n"
+        output += f"GridSize: {grid_size}x{grid_size}\n"
+        output += f"TimeSteps: {time_steps}\n"
+        output += f"Time: {elapsed.value:.6f}\n"
+        output += f"Throughput: {mlups.value:.2f}\n"
+        output += f"CenterValue: {center.value:f}\n"
+        return output
+        
     def run_solver(self, implementation, col_index):
         try:
             grid_size = int(self.grid_var.get().split('x')[0])
@@ -135,33 +166,39 @@ class HeatEquationApp:
             self.output_text.see(tk.END)
             self.output_text.config(state=tk.DISABLED)
             
-            # Determine which executable to run
-            if platform.system() == "Linux":
-                cmd = f"./{implementation.lower()}_heat {grid_size} {grid_size} {time_steps}"
+            if implementation == "CUDA" and self.heat_lib is not None:
+                # Call the already-loaded solver library directly
+                output = self.run_cuda_library(grid_size, int(time_steps))
+                errors = ""
             else:
-                cmd = f"{implementation.lower()}_heat {grid_size} {grid_size} {time_steps}"
-            
-            # Run the command
-            result = subprocess.run(
-                cmd, 
-                shell=True, 
-                check=True, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True
-            )
+                # Determine which executable to run
+                if platform.system() == "Linux":
+                    cmd = f"./{implementation.lower()}_heat {grid_size} {grid_size} {time_steps}"
+                else:
+                    cmd = f"{implementation.lower()}_heat {grid_size} {grid_size} {time_steps}"
+                
+                # Run the command
+                result = subprocess.run(
+                    cmd, 
+                    shell=True, 
+                    check=True, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.PIPE,
+                    text=True
+                )
+                output, errors = result.stdout, result.stderr
             
             # Update output console
             self.output_text.config(state=tk.NORMAL)
             self.output_text.insert(tk.END, f"\n{implementation} output:\n")
-            self.output_text.insert(tk.END, result.stdout)
-            if result.stderr:
-                self.output_text.insert(tk.END, f"\nErrors:\n{result.stderr}")
+            self.output_text.insert(tk.END, output)
+            if errors:
+                self.output_text.insert(tk.END, f"\nErrors:\n{errors}")
             self.output_text.see(tk.END)
             self.output_text.config(state=tk.DISABLED)
             
             # Parse and visualize results
-            self.parse_and_visualize(result.stdout, implementation, col_index)
+            self.parse_and_visualize(output, implementation, col_index)
             
         except subprocess.CalledProcessError as e:
             error_msg = f"\nError running {implementation} solver:\n{e.stderr}"
@@ -237,14 +274,12 @@ class HeatEquationApp:
         column["ax"].clear()
         
         try:
-            # Create sample heat distribution
+            # Create sample heat distribution (broadcast instead of meshgrid)
             x = np.linspace(-0.5, 0.5, self.grid_size)
-            y = np.linspace(-0.5, 0.5, self.grid_size)
-            X, Y = np.meshgrid(x, y)
-            Z = np.exp(-50*(X**2 + Y**2))
+            Z = np.exp(-50*(x[:, None]**2 + x[None, :]**2))
             
-            # Plot with implementation-specific color
-            c = column["ax"].pcolormesh(X, Y, Z, cmap='hot', shading='auto')
+            # imshow draws the regular grid as a single image instead of a QuadMesh
+            c = column["ax"].imshow(Z, cmap='hot', extent=[-0.5, 0.5, -0.5, 0.5], origin='lower')
             column["fig"].colorbar(c, ax=column["ax"])
             column["ax"].set_title(f"{implementation}\nCenter: {metrics['CenterValue']}")
         except Exception as e: